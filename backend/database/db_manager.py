@@ -1,66 +1,184 @@
-import json
+import asyncio
+import mmap
 import os
-from typing import List, Optional
+import sqlite3
+import threading
+import orjson
+from cachetools import TTLCache
+from pydantic import TypeAdapter
+from typing import Dict, List, Optional
 from models.schemas import Application, SNP
-from datetime import datetime
 
 DATA_DIR = "data"
-APPLICATIONS_FILE = os.path.join(DATA_DIR, "applications.json")
-SNPS_FILE = os.path.join(DATA_DIR, "snps.json")
+DB_FILE = os.path.join(DATA_DIR, "app.db")
+APPLICATIONS_FILE = os.path.join(DATA_DIR, "applications.json")  # legacy, imported once into DB_FILE
+SNPS_FILE = os.path.join(DATA_DIR, "snps.json")  # legacy, imported once into DB_FILE
+FLUSH_WINDOW = 0.05  # seconds to coalesce application writes before flushing
+FLUSH_RETRY_MAX = 5.0  # seconds, cap on the backoff between failed flushes
+BUSY_TIMEOUT = 1.0  # seconds SQLite waits on a locked database before giving up
+
+def _to_json(model) -> bytes:
+    # Serialized straight to JSON in pydantic-core, skipping the intermediate dict
+    return model.model_dump_json(by_alias=True).encode()
+
+def _from_json(model_cls, blob: bytes):
+    # Parsed and validated in one pass inside pydantic-core
+    return model_cls.model_validate_json(blob)
+
+_APPLICATION_LIST = TypeAdapter(List[Application])
+
+def _applications_from_json(blobs: List[bytes]) -> List[Application]:
+    # One validate_json call over a JSON array instead of one model per row
+    return _APPLICATION_LIST.validate_json(b"[" + b",".join(blobs) + b"]")
 
 class DBManager:
     def __init__(self):
-        self.applications = []
-        self.snps = []
+        self.snps_by_id: Dict[str, SNP] = {}
+        # Applications accepted but not yet flushed to disk
+        self._pending: Dict[str, Application] = {}
+        # Status polls re-read the same applications far more often than they change
+        self._app_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._read_conn: Optional[sqlite3.Connection] = None
         self._ensure_data_dir()
         self.load_data()
 
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Write connection, opened on first use and again after close() so the app can restart"""
+        if self._conn is None:
+            # Writes happen on an executor thread under self._lock
+            self._conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    @property
+    def read_conn(self) -> sqlite3.Connection:
+        """Read connection for the event loop; in WAL mode it never waits on the writer or its lock"""
+        if self._read_conn is None:
+            self._read_conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+            self._read_conn.execute("PRAGMA query_only=ON")
+        return self._read_conn
+
     def _ensure_data_dir(self):
         if not os.path.exists(DATA_DIR):
             os.makedirs(DATA_DIR)
 
     def load_data(self):
-        """Load data from JSON files."""
-        if os.path.exists(APPLICATIONS_FILE):
+        """Create tables and seed them from legacy JSON files or defaults."""
+        self.conn.execute("CREATE TABLE IF NOT EXISTS applications (id TEXT PRIMARY KEY, json BLOB NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS snps (id TEXT PRIMARY KEY, json BLOB NOT NULL)")
+
+        if self._is_empty("applications") and os.path.exists(APPLICATIONS_FILE):
+            applications = []
+            for app_dict in self._read_legacy_file(APPLICATIONS_FILE):
+                # Older files were written without aliases
+                if "id" not in app_dict and "application_id" in app_dict:
+                    app_dict["id"] = app_dict.pop("application_id")
+                applications.append(Application(**app_dict))
+            self._upsert("applications", [(app.application_id, _to_json(app)) for app in applications])
+
+        if self._is_empty("snps"):
+            if os.path.exists(SNPS_FILE):
+                snps = [SNP(**snp_dict) for snp_dict in self._read_legacy_file(SNPS_FILE)]
+            else:
+                # Initialize with some mock SNPs if nothing was stored yet
+                snps = self._get_default_snps()
+            self._upsert("snps", [(snp.id, _to_json(snp)) for snp in snps])
+
+        # SNPs are only written while seeding, so keep them indexed in memory
+        rows = self.conn.execute("SELECT json FROM snps")
+        self.snps_by_id = {snp.id: snp for snp in (_from_json(SNP, row[0]) for row in rows)}
+
+    def _is_empty(self, table: str) -> bool:
+        return self.conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+    def _read_legacy_file(self, path: str) -> list:
+        """Read one of the JSON files used before the SQLite store."""
+        if os.path.getsize(path) == 0:
+            return []
+        try:
+            # Hand orjson the mapped pages directly instead of copying through f.read()
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return orjson.loads(memoryview(mm))
+        except orjson.JSONDecodeError:
+            return []
+
+    def _upsert(self, table: str, rows: list):
+        """Write (id, json) rows in a single transaction."""
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so a busy database fails here and not mid-write
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(f"INSERT OR REPLACE INTO {table} (id, json) VALUES (?, ?)", rows)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                # Never leave the shared connection inside a transaction, later BEGINs would all fail.
+                # SQLite already rolls back by itself on some errors, hence the check
+                if self.conn.in_transaction:
+                    self.conn.execute("ROLLBACK")
+                raise
+
+    async def _flusher(self):
+        """Write queued applications to disk in batches, off the event loop."""
+        loop = asyncio.get_running_loop()
+        retry_delay = FLUSH_WINDOW
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(FLUSH_WINDOW)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Last write wins for the same ID within a batch
+            latest = {app.application_id: app for app in batch}
             try:
-                with open(APPLICATIONS_FILE, 'r') as f:
-                    data = json.load(f)
-                    # Convert dicts back to Pydantic models (handling datetime serialization)
-                    self.applications = []
-                    for app_dict in data:
-                        # Pydantic handles naive datetimes, but we might need to be careful
-                        self.applications.append(Application(**app_dict))
-            except json.JSONDecodeError:
-                self.applications = []
-        
-        if os.path.exists(SNPS_FILE):
+                rows = [(app_id, _to_json(app)) for app_id, app in latest.items()]
+                await loop.run_in_executor(None, self._upsert, "applications", rows)
+                for app_id, app in latest.items():
+                    if self._pending.get(app_id) is app:
+                        del self._pending[app_id]
+                retry_delay = FLUSH_WINDOW
+            except Exception as e:
+                # Keep them pending so reads still see them, and queue them again after a backoff
+                print(f"Failed to flush applications, retrying in {retry_delay:.2f}s: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, FLUSH_RETRY_MAX)
+                for app_id, app in latest.items():
+                    # Skip anything superseded by a newer write, that one is queued already
+                    if self._pending.get(app_id) is app:
+                        self._queue.put_nowait(app)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def close(self):
+        """Stop the flusher and write out anything still pending."""
+        if self._flusher_task:
+            self._flusher_task.cancel()
             try:
-                with open(SNPS_FILE, 'r') as f:
-                    data = json.load(f)
-                    self.snps = [SNP(**snp_dict) for snp_dict in data]
-            except json.JSONDecodeError:
-                self.snps = []
-        else:
-             # Initialize with some mock SNPs if file doesn't exist
-            self.snps = self._get_default_snps()
-            self.save_data()
-
-    def save_data(self):
-        """Save data to JSON files."""
-        # Helper to serialize datetime objects
-        def json_serial(obj):
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError ("Type %s not serializable" % type(obj))
-
-        with open(APPLICATIONS_FILE, 'w') as f:
-            # Convert Pydantic models to dicts
-            app_data = [app.dict() for app in self.applications]
-            json.dump(app_data, f, default=json_serial, indent=2)
-            
-        with open(SNPS_FILE, 'w') as f:
-            snp_data = [snp.dict() for snp in self.snps]
-            json.dump(snp_data, f, default=json_serial, indent=2)
+                await self._flusher_task
+            except asyncio.CancelledError:
+                pass
+            self._flusher_task = None
+        try:
+            if self._pending:
+                self._upsert("applications", [(app_id, _to_json(app)) for app_id, app in self._pending.items()])
+                self._pending.clear()
+        finally:
+            # Release the connections even if that last write failed; whatever is still
+            # pending stays in memory and the next close() tries again
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+            # A write cancelled above may still be running on the executor thread
+            with self._lock:
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
 
     def _get_default_snps(self):
         from models.schemas import SNP, Location
@@ -98,26 +216,38 @@ class DBManager:
         ]
 
     async def create_application(self, application: Application) -> Application:
-        # Check if ID exists, if so, update
-        existing_index = next((i for i, app in enumerate(self.applications) if app.application_id == application.application_id), -1)
-        if existing_index != -1:
-            self.applications[existing_index] = application
-        else:
-            self.applications.append(application)
-        
-        self.save_data()
+        # Visible to reads right away; the flusher persists it in the background
+        self._pending[application.application_id] = application
+        self._app_cache.pop(application.application_id, None)
+        if self._flusher_task is None:
+            self._queue = asyncio.Queue()
+            self._flusher_task = asyncio.create_task(self._flusher())
+        self._queue.put_nowait(application)
         return application
 
     async def get_application(self, application_id: str) -> Optional[Application]:
-        return next((app for app in self.applications if app.application_id == application_id), None)
+        pending = self._pending.get(application_id)
+        if pending is not None:
+            return pending
+        cached = self._app_cache.get(application_id)
+        if cached is not None:
+            return cached
+        row = self.read_conn.execute("SELECT json FROM applications WHERE id = ?", (application_id,)).fetchone()
+        if not row:
+            return None
+        application = _from_json(Application, row[0])
+        self._app_cache[application_id] = application
+        return application
 
     async def list_applications(self) -> List[Application]:
-        return self.applications
+        rows = self.read_conn.execute("SELECT id, json FROM applications").fetchall()
+        stored = _applications_from_json([blob for app_id, blob in rows if app_id not in self._pending])
+        return stored + list(self._pending.values())
 
     async def list_snps(self) -> List[SNP]:
-        return self.snps
+        return list(self.snps_by_id.values())
 
     async def get_snp(self, snp_id: str) -> Optional[SNP]:
-        return next((snp for snp in self.snps if snp.id == snp_id), None)
+        return self.snps_by_id.get(snp_id)
 
 db = DBManager()
@@ -3,13 +3,17 @@ MSME Agent Mapping - Main API Server
 FastAPI backend for voice-enabled MSE onboarding to ONDC
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Body
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Body, Response
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import AsyncExitStack, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uvicorn
+import asyncio
 import json
+import orjson
 
 # Import our custom modules
 from services.voice_service import VoiceService
@@ -19,13 +23,31 @@ from services.document_service import DocumentService
 from database.db_manager import db as db_manager
 from models.schemas import (
     MSEProfile, SNP, Application, 
-    VoiceInput, CategoryResult, MatchResult
+    VoiceInput, CategoryResult, MatchResult, RecommendationsResponse
 )
 
+# Workers for blocking I/O (DB flushes, document processing); the stock
+# default of min(32, cpu + 4) is tuned for CPU work, not waiting on I/O
+BLOCKING_IO_WORKERS = 64
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executor = ThreadPoolExecutor(max_workers=BLOCKING_IO_WORKERS, thread_name_prefix="blocking-io")
+    asyncio.get_running_loop().set_default_executor(executor)
+    # Teardown runs in reverse order, and every step runs even if an earlier one raises
+    async with AsyncExitStack() as teardown:
+        teardown.callback(executor.shutdown, wait=False)
+        teardown.push_async_callback(matching_service.aclose)
+        teardown.push_async_callback(categorization_service.aclose)
+        # Flush applications still waiting in the write-behind queue
+        teardown.push_async_callback(db_manager.close)
+        yield
+
 app = FastAPI(
     title="MSME Agent Mapping API",
     description="AI-powered MSE onboarding to ONDC via TEAM initiative",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend access
@@ -55,7 +77,7 @@ async def root():
         "service": "MSME Agent Mapping API",
         "status": "operational",
         "version": "1.0.0",
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 @app.get("/health")
@@ -68,7 +90,7 @@ async def health_check():
             "categorization": categorization_service.model_loaded,
             "matching": matching_service.model_loaded
         },
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": datetime.utcnow()
     }
 
 
@@ -92,11 +114,8 @@ async def transcribe_audio(
         Transcribed text with confidence score
     """
     try:
-        # Read audio file
-        audio_bytes = await audio.read()
-        
-        # Process with voice service
-        result = voice_service.transcribe(audio_bytes, language)
+        # UploadFile is already spooled to a temp file, hand it over without reading it into memory
+        result = voice_service.transcribe(audio.file, language)
         
         return {
             "success": True,
@@ -182,7 +201,7 @@ async def categorize_product(
         Category hierarchy, attributes, compliance requirements
     """
     try:
-        result = categorization_service.categorize(
+        result = await categorization_service.categorize(
             description=description,
             language=language,
             extract_attributes=include_attributes
@@ -212,10 +231,8 @@ async def categorize_bulk_products(products: List[str], language: str = "en"):
         List of categorization results
     """
     try:
-        results = []
-        for description in products:
-            result = categorization_service.categorize(description, language)
-            results.append(result)
+        # Each categorization may wait on an LLM round-trip, so run them concurrently
+        results = await categorization_service.categorize_batch(products, language)
         
         return {
             "success": True,
@@ -252,7 +269,7 @@ async def get_taxonomy(level: int = 1):
 # MSE-SNP MATCHING ENDPOINTS
 # ============================================================================
 
-@app.post("/api/v1/match/recommend-snps")
+@app.post("/api/v1/match/recommend-snps", response_model=RecommendationsResponse)
 async def recommend_snps(
     mse_profile: dict = Body(...),
     top_k: int = 10
@@ -272,25 +289,8 @@ async def recommend_snps(
             mse_profile=mse_profile,
             top_k=top_k
         )
-        return {
-            "success": True,
-            "recommendations": [
-                {
-                    "rank": r.rank,
-                    "snp": {
-                        "name": r.snp.name,
-                        "description": r.snp.description,
-                        "location": r.snp.location.dict(),
-                        "phone": getattr(r.snp, "phone", "N/A"),
-                        "address": r.snp.location.address,
-                        "pincode": r.snp.location.pincode
-                    },
-                    "match_score": r.match_score.dict(),
-                    "explanation": r.explanation.dict()
-                } for r in recommendations
-            ],
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        # Returned as models so FastAPI serializes them in one pass, no per-field .dict() calls
+        return RecommendationsResponse(recommendations=recommendations, timestamp=datetime.utcnow())
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Matching failed: {str(e)}")
 
@@ -377,14 +377,15 @@ async def create_application(application: Application):
         Application ID and status
     """
     try:
-        app_id = db_manager.create_application(application.dict())
+        created = await db_manager.create_application(application)
+        app_id = created.application_id
         
         return {
             "success": True,
             "application_id": app_id,
             "status": "submitted",
             "estimated_processing_time": "3-5 days",
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Application creation failed: {str(e)}")
@@ -402,7 +403,7 @@ async def get_application_status(app_id: str):
         Application details and current status
     """
     try:
-        application = db_manager.get_application(app_id)
+        application = await db_manager.get_application(app_id)
         
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
@@ -467,9 +468,9 @@ async def upload_document(
     Upload and process document (GST, Udyam, certificates, or requirement)
     """
     try:
-        file_bytes = await file.read()
-        extracted_data = document_service.process_document(
-            file_bytes=file_bytes,
+        # Pass the spooled upload through instead of reading it all into memory
+        extracted_data = await document_service.process_document(
+            file=file.file,
             file_type=file.content_type,
             document_type=document_type
         )
@@ -503,7 +504,7 @@ async def validate_document(document_type: str, data: Dict[str, Any]):
         Validation result
     """
     try:
-        validation_result = document_service.validate(document_type, data)
+        validation_result = await document_service.validate(document_type, data)
         
         return {
             "success": True,
@@ -533,7 +534,7 @@ async def get_dashboard_metrics():
         return {
             "success": True,
             "metrics": metrics,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch metrics: {str(e)}")
@@ -557,7 +558,7 @@ async def get_model_performance():
         return {
             "success": True,
             "performance": performance,
-            "timestamp": datetime.utcnow().isoformat()
+            "timestamp": datetime.utcnow()
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch performance: {str(e)}")
@@ -567,27 +568,30 @@ async def get_model_performance():
 # CONFIGURATION ENDPOINTS
 # ============================================================================
 
+# The language list never changes, so encode the response once at import time
+SUPPORTED_LANGUAGES_RESPONSE = orjson.dumps({
+    "success": True,
+    "languages": [
+        {"code": "hi", "name": "Hindi", "native": "हिन्दी"},
+        {"code": "en", "name": "English", "native": "English"},
+        {"code": "bn", "name": "Bengali", "native": "বাংলা"},
+        {"code": "te", "name": "Telugu", "native": "తెలుగు"},
+        {"code": "mr", "name": "Marathi", "native": "मराठी"},
+        {"code": "ta", "name": "Tamil", "native": "தமிழ்"},
+        {"code": "gu", "name": "Gujarati", "native": "ગુજરાતી"},
+        {"code": "ur", "name": "Urdu", "native": "اردو"},
+        {"code": "kn", "name": "Kannada", "native": "ಕನ್ನಡ"},
+        {"code": "ml", "name": "Malayalam", "native": "മലയാളം"},
+        {"code": "or", "name": "Odia", "native": "ଓଡ଼ିଆ"},
+        {"code": "pa", "name": "Punjabi", "native": "ਪੰਜਾਬੀ"},
+        {"code": "as", "name": "Assamese", "native": "অসমীয়া"}
+    ]
+})
+
 @app.get("/api/v1/config/languages")
 async def get_supported_languages():
     """Get list of supported languages"""
-    return {
-        "success": True,
-        "languages": [
-            {"code": "hi", "name": "Hindi", "native": "हिन्दी"},
-            {"code": "en", "name": "English", "native": "English"},
-            {"code": "bn", "name": "Bengali", "native": "বাংলা"},
-            {"code": "te", "name": "Telugu", "native": "తెలుగు"},
-            {"code": "mr", "name": "Marathi", "native": "मराठी"},
-            {"code": "ta", "name": "Tamil", "native": "தமிழ்"},
-            {"code": "gu", "name": "Gujarati", "native": "ગુજરાતી"},
-            {"code": "ur", "name": "Urdu", "native": "اردو"},
-            {"code": "kn", "name": "Kannada", "native": "ಕನ್ನಡ"},
-            {"code": "ml", "name": "Malayalam", "native": "മലയാളം"},
-            {"code": "or", "name": "Odia", "native": "ଓଡ଼ିଆ"},
-            {"code": "pa", "name": "Punjabi", "native": "ਪੰਜਾਬੀ"},
-            {"code": "as", "name": "Assamese", "native": "অসমীয়া"}
-        ]
-    }
+    return Response(content=SUPPORTED_LANGUAGES_RESPONSE, media_type="application/json")
 
 
 # ============================================================================
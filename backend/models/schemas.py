@@ -65,6 +65,11 @@ class MatchResult(BaseModel):
     explanation: MatchExplanation
     rank: int
 
+class RecommendationsResponse(BaseModel):
+    success: bool = True
+    recommendations: List[MatchResult]
+    timestamp: datetime
+
 class SnpRecommendationRequest(BaseModel):
     business_info: MSEProfile # Allow nested or flat? The frontend sends nested.
     # Frontend sends:
@@ -1,6 +1,14 @@
-import json
+import asyncio
+import mmap
 import os
-from typing import Dict, Any, List
+import re
+import orjson
+from typing import Dict, Any, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
 
 # Consistent Import
 try:
@@ -12,10 +20,21 @@ except ImportError:
         LLMService = None
 
 TAXONOMY_FILE = os.path.join("data", "taxonomy.json")
+# Ollama works through generations one model slot at a time; anything past this waits
+# here instead of in the HTTP pool, where it would hit the read/pool timeouts
+MAX_CONCURRENT_CATEGORIZATIONS = 4
+_TOKEN_RE = re.compile(r"\w+")
+
+def _is_word_char(text: str, i: int) -> bool:
+    return 0 <= i < len(text) and _TOKEN_RE.match(text, i, i + 1) is not None
 
 class CategorizationService:
     def __init__(self):
         self.taxonomy = {}
+        self._leaf_paths: List[Tuple[str, str, str]] = []
+        self._kw_index: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._phrase_index: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._automaton = None
         self.load_taxonomy()
         
         self.llm = None
@@ -31,19 +50,90 @@ class CategorizationService:
     def load_taxonomy(self):
         file_path = os.path.join(os.path.dirname(__file__), "..", "data", "taxonomy.json")
         try:
-            with open(file_path, "r") as f:
-                self.taxonomy = json.load(f)
+            # Parse straight from the page cache; with a preloaded app server the
+            # parsed dict is then shared copy-on-write by forked workers
+            with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.taxonomy = orjson.loads(memoryview(mm))
         except Exception as e:
             print(f"Error loading taxonomy: {e}")
             self.taxonomy = {}
+        self._build_keyword_index()
+
+    def _build_keyword_index(self):
+        """Map lowercased keywords to the (start, end, weight) leaf ranges they score"""
+        self._leaf_paths = []
+        self._kw_index = {}
+        self._phrase_index = {}
+
+        def add_keyword(term, start, end, weight):
+            term = term.lower()
+            # Multi-word terms can't be looked up by token, keep them for substring checks
+            index = self._kw_index if _TOKEN_RE.fullmatch(term) else self._phrase_index
+            index.setdefault(term, []).append((start, end, weight))
+
+        def walk(node, path):
+            for key, value in node.items():
+                new_path = path + [key]
+                start = len(self._leaf_paths)
+                # Leaves get ordinals in traversal order, so a node's leaves form one range
+                if isinstance(value, dict):
+                    walk(value, new_path)
+                elif isinstance(value, list):
+                    # Leaf node (L4/L5)
+                    labels = (
+                        new_path[0],
+                        new_path[1] if len(new_path) >= 2 else "General",
+                        new_path[2] if len(new_path) >= 3 else "General Items"
+                    )
+                    for item in value:
+                        add_keyword(item, len(self._leaf_paths), len(self._leaf_paths) + 1, 20)
+                        self._leaf_paths.append(labels)
+                if len(self._leaf_paths) > start:
+                    add_keyword(key, start, len(self._leaf_paths), 10)
+
+        walk(self.taxonomy.get("categories", {}), [])
+
+        # With pyahocorasick available, one automaton finds every keyword in a single pass
+        self._automaton = None
+        if ahocorasick and (self._kw_index or self._phrase_index):
+            automaton = ahocorasick.Automaton()
+            for term, entries in self._kw_index.items():
+                automaton.add_word(term, (term, entries, True))
+            for term, entries in self._phrase_index.items():
+                automaton.add_word(term, (term, entries, False))
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def _match_keywords(self, description: str) -> List[Tuple[int, int, int]]:
+        """Return the index entries of every taxonomy keyword found in a lowercased description"""
+        matched = []
+        if self._automaton is not None:
+            seen = set()
+            for end, (term, entries, whole_word) in self._automaton.iter(description):
+                start = end - len(term) + 1
+                if term in seen:
+                    continue
+                # Single-word terms only count as whole words, same as the token lookup
+                if whole_word and (_is_word_char(description, start - 1) or _is_word_char(description, end + 1)):
+                    continue
+                seen.add(term)
+                matched.extend(entries)
+            return matched
+
+        for token in set(_TOKEN_RE.findall(description)):
+            matched.extend(self._kw_index.get(token, ()))
+        for phrase, entries in self._phrase_index.items():
+            if phrase in description:
+                matched.extend(entries)
+        return matched
 
-    def categorize(self, description: str, language: str = "en", extract_attributes: bool = True) -> Dict[str, Any]:
+    async def categorize(self, description: str, language: str = "en", extract_attributes: bool = True) -> Dict[str, Any]:
         """Categorize based on LLM first, falling back to keywords"""
         
         # 1. Try LLM
         if self.llm:
             try:
-                llm_result = self.llm.categorize_product(description)
+                llm_result = await self.llm.categorize_product(description)
                 
                 # Check confidence or if result is empty
                 if llm_result and llm_result.get("confidence", 0) > 0.4: 
@@ -64,34 +154,20 @@ class CategorizationService:
         l2_cat = "General"
         l3_cat = "General Items"
         max_score = 0
-        
-        # Helper to recursively search
-        def search_tree(node, current_path, score):
-            nonlocal max_score, l1_cat, l2_cat, l3_cat
-            
-            for key, value in node.items():
-                current_score = score
-                if key.lower() in description:
-                    current_score += 10
-                
-                new_path = current_path + [key]
-                
-                if isinstance(value, dict):
-                    search_tree(value, new_path, current_score)
-                elif isinstance(value, list):
-                    # Leaf node (L4/L5)
-                    for item in value:
-                        item_score = current_score
-                        if item.lower() in description:
-                            item_score += 20
-                        
-                        if item_score > max_score and item_score > 0:
-                            max_score = item_score
-                            if len(new_path) >= 1: l1_cat = new_path[0]
-                            if len(new_path) >= 2: l2_cat = new_path[1]
-                            if len(new_path) >= 3: l3_cat = new_path[2]
-
-        search_tree(self.taxonomy.get("categories", {}), [], 0)
+
+        matched = self._match_keywords(description)
+
+        # A leaf scores the weights of every matched keyword on its path
+        scores: Dict[int, int] = {}
+        for start, end, weight in matched:
+            for leaf in range(start, end):
+                scores[leaf] = scores.get(leaf, 0) + weight
+
+        if scores:
+            # Highest score wins, ties go to the leaf seen first in the taxonomy
+            best = min(scores, key=lambda leaf: (-scores[leaf], leaf))
+            max_score = scores[best]
+            l1_cat, l2_cat, l3_cat = self._leaf_paths[best]
         
         return {
             "categories": {
@@ -106,6 +182,19 @@ class CategorizationService:
             "confidence": 0.5 if max_score == 0 else 0.8
         }
     
+    async def categorize_batch(self, descriptions: List[str], language: str = "en") -> List[Dict[str, Any]]:
+        """Categorize several descriptions concurrently, results in input order"""
+        sem = asyncio.Semaphore(MAX_CONCURRENT_CATEGORIZATIONS)
+        return await asyncio.gather(*(self._guarded_categorize(sem, description, language) for description in descriptions))
+
+    async def _guarded_categorize(self, sem: asyncio.Semaphore, description: str, language: str) -> Dict[str, Any]:
+        async with sem:
+            return await self.categorize(description, language)
+
+    async def aclose(self):
+        if self.llm:
+            await self.llm.aclose()
+
     def get_taxonomy(self, level: int) -> Dict[str, Any]:
         return self.taxonomy
 
@@ -1,7 +1,15 @@
-from typing import Dict, Any
+import asyncio
+from typing import Dict, Any, BinaryIO
 
 class DocumentService:
-    def process_document(self, file_bytes: bytes, file_type: str, document_type: str) -> Dict[str, Any]:
+    async def process_document(self, file: BinaryIO, file_type: str, document_type: str) -> Dict[str, Any]:
+        """Run document processing in a worker thread so OCR never blocks the event loop"""
+        return await asyncio.to_thread(self._process_sync, file, file_type, document_type)
+
+    async def validate(self, document_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._validate_sync, document_type, data)
+
+    def _process_sync(self, file: BinaryIO, file_type: str, document_type: str) -> Dict[str, Any]:
         """Mock OCR processing"""
         return {
             "extracted_text": "Sample Extracted Text",
@@ -11,7 +19,7 @@ class DocumentService:
             }
         }
 
-    def validate(self, document_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    def _validate_sync(self, document_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Mock validation"""
         return {
             "valid": True,
@@ -1,22 +1,173 @@
-import requests
+import asyncio
+import httpx
 import json
 import logging
-from typing import Dict, Any, List
+import re
+import orjson
+from cachetools import LRUCache
+from typing import Dict, Any, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Outermost {...} in a response, same span as find('{') .. rfind('}')
+_JSON_RE = re.compile(r'\{.*\}', re.S)
+BATCH_WINDOW = 0.02  # seconds to collect concurrent generate calls
+MAX_BATCH_SIZE = 16
+GENERATE_TIMEOUT = 30.0  # seconds for a whole generation, httpx's timeout only bounds each chunk
+MIN_INPUT_LENGTH = 3  # shorter inputs carry nothing worth a generation
+
+def _empty_categorization() -> Dict[str, Any]:
+    # Fresh containers each time, callers are free to mutate the result
+    return {"categories": {}, "attributes": {}, "compliance": [], "confidence": 0.0}
+
+class _Batcher:
+    """Coalesces generate calls arriving within BATCH_WINDOW and dispatches them together"""
+
+    def __init__(self, generate):
+        self._generate = generate
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._inflight = set()
+        # Every future handed out by submit() that has no result yet
+        self._waiting = set()
+
+    async def submit(self, prompt: str, system_prompt: str = None) -> str:
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.add(future)
+        future.add_done_callback(self._waiting.discard)
+        self._queue.put_nowait((prompt, system_prompt, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(BATCH_WINDOW)
+            while len(batch) < MAX_BATCH_SIZE and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            # Identical prompts in the same window share a single generation
+            groups: Dict[Tuple[str, Optional[str]], List[asyncio.Future]] = {}
+            for prompt, system_prompt, future in batch:
+                groups.setdefault((prompt, system_prompt), []).append(future)
+
+            # Dispatch without waiting so the next window can start collecting
+            task = asyncio.create_task(self._dispatch(groups))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    async def _dispatch(self, groups):
+        keys = list(groups)
+        results = await asyncio.gather(*(self._generate(*key) for key in keys), return_exceptions=True)
+        for key, result in zip(keys, results):
+            for future in groups[key]:
+                if future.done():  # caller went away
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            for task in list(self._inflight):
+                task.cancel()
+            await asyncio.gather(self._task, *self._inflight, return_exceptions=True)
+            self._task = None
+            self._queue = None
+        # Fail callers whose prompt was still queued or in a cancelled batch, instead of leaving them hanging
+        for future in list(self._waiting):
+            if not future.done():
+                future.set_exception(RuntimeError("LLM batcher closed"))
+
 class LLMService:
+    # Static prompt text comes first and never changes between calls, so Ollama can keep
+    # its KV cache for the shared prefix and only process the input appended at the end
+    CATEGORIZE_SYSTEM_PROMPT = """You are an AI assistant for ONDC (Open Network for Digital Commerce). 
+        Your task is to categorize product descriptions into a hierarchical taxonomy (Level 1 > Level 2 > Level 3). 
+        You must also extract key attributes like material, color, usage, etc.
+        Return ONLY valid JSON."""
+
+    CATEGORIZE_PROMPT_PREFIX = """
+        Task:
+        1. Classify the product described at the end into Level 1, Level 2, and Level 3 categories.
+        2. Extract key attributes as key-value pairs.
+        3. Identify compliance requirements (e.g., FSSAI, BIS) if applicable.
+
+        Output Format (JSON):
+        {
+            "categories": {
+                "level_1": "Category",
+                "level_2": "Sub-Category",
+                "level_3": "Item Type"
+            },
+            "attributes": {
+                "attribute_1": "value",
+                "attribute_2": "value"
+            },
+            "compliance": ["Requirement1", "Requirement2"],
+            "confidence": 0.95
+        }
+
+        """
+
+    ENTITIES_SYSTEM_PROMPT = """You are an AI assistant processing voice transcripts for business registration.
+        Extract the following fields: Company Name, Owner Name, Location (City/State), Products (list), Contact Info (Phone/Email).
+        Return ONLY valid JSON."""
+
+    ENTITIES_PROMPT_PREFIX = """
+        Output Format (JSON):
+        {
+            "company_name": "Name or null",
+            "owner_name": "Name or null",
+            "location": {
+                "city": "City or null",
+                "state": "State or null"
+            },
+            "products": ["product1", "product2"],
+            "contact": {
+                "phone": "Number or null",
+                "email": "Email or null"
+            }
+        }
+
+        """
+
     def __init__(self, model_name="llama3.1:latest", base_url="http://localhost:11434"):
         self.model_name = model_name
         self.base_url = base_url
-        self.api_generate = f"{base_url}/api/generate"
+        self._client = None
+        self._batcher = _Batcher(self._generate)
+        # Generation runs at temperature 0.1, so repeat descriptions get the same answer.
+        # Holds the JSON text, every hit parses a fresh dict that callers are free to mutate
+        self._categorize_cache: LRUCache = LRUCache(maxsize=1024)
 
-    def _generate(self, prompt: str, system_prompt: str = None) -> str:
-        """Helper to call Ollama generate API"""
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Shared keep-alive client, created on first use inside the running event loop"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+            )
+        return self._client
+
+    async def aclose(self):
+        await self._batcher.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _generate(self, prompt: str, system_prompt: str = None) -> str:
+        """Helper to call Ollama generate API, returning once the first JSON object is complete"""
         payload = {
             "model": self.model_name,
             "prompt": prompt,
-            "stream": False,
+            "stream": True,
             "options": {
                 "temperature": 0.1,  # Low temperature for deterministic/factual outputs
                 "top_p": 0.9,
@@ -26,99 +177,86 @@ class LLMService:
             payload["system"] = system_prompt
 
         try:
-            response = requests.post(self.api_generate, json=payload, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            return data.get("response", "").strip()
-        except requests.exceptions.RequestException as e:
+            return await asyncio.wait_for(self._stream_generate(payload), timeout=GENERATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"Ollama generation timed out after {GENERATE_TIMEOUT}s")
+            return ""
+        except (httpx.HTTPError, json.JSONDecodeError) as e:
             logger.error(f"Ollama API error: {e}")
             # Fallback or re-raise depending on strategy. For now, log and return empty.
             return ""
 
-    def categorize_product(self, description: str, taxonomy_context: str = "") -> Dict[str, Any]:
+    async def _stream_generate(self, payload: Dict[str, Any]) -> str:
+        decoder = json.JSONDecoder()
+        text = ""
+        async with self.client.stream("POST", "/api/generate", json=payload) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = orjson.loads(line)
+                piece = chunk.get("response", "")
+                text += piece
+                # Callers only want the JSON object; leaving the block closes the
+                # stream and frees the model instead of waiting for trailing tokens
+                start = text.find('{')
+                if '}' in piece and start != -1:
+                    try:
+                        _, end = decoder.raw_decode(text, start)
+                        return text[:end].strip()
+                    except json.JSONDecodeError:
+                        pass
+                if chunk.get("done"):
+                    break
+        return text.strip()
+
+    async def categorize_product(self, description: str, taxonomy_context: str = "") -> Dict[str, Any]:
         """
         Categorize a product description into ONDC taxonomy levels.
         taxonomy_context can be a simplified string representation of the taxonomy tree.
         """
-        system_prompt = """You are an AI assistant for ONDC (Open Network for Digital Commerce). 
-        Your task is to categorize product descriptions into a hierarchical taxonomy (Level 1 > Level 2 > Level 3). 
-        You must also extract key attributes like material, color, usage, etc.
-        Return ONLY valid JSON."""
+        if not description or len(description.strip()) < MIN_INPUT_LENGTH:
+            return _empty_categorization()
 
-        prompt = f"""
-        Product Description: "{description}"
-        
-        Task:
-        1. Classify this product into Level 1, Level 2, and Level 3 categories.
-        2. Extract key attributes as key-value pairs.
-        3. Identify compliance requirements (e.g., FSSAI, BIS) if applicable.
+        cache_key = (" ".join(description.lower().split()), taxonomy_context)
+        cached = self._categorize_cache.get(cache_key)
+        if cached is not None:
+            return orjson.loads(cached)
+
+        # Only the description varies, keep it at the tail so Ollama can reuse the cached prefix
+        prompt = self.CATEGORIZE_PROMPT_PREFIX + f'Product Description: "{description}"\n'
 
-        Output Format (JSON):
-        {{
-            "categories": {{
-                "level_1": "Category",
-                "level_2": "Sub-Category",
-                "level_3": "Item Type"
-            }},
-            "attributes": {{
-                "attribute_1": "value",
-                "attribute_2": "value"
-            }},
-            "compliance": ["Requirement1", "Requirement2"],
-            "confidence": 0.95
-        }}
-        """
-        
         try:
-            response_text = self._generate(prompt, system_prompt)
+            response_text = await self._batcher.submit(prompt, self.CATEGORIZE_SYSTEM_PROMPT)
             # Find JSON in response (in case of extra text)
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            if start != -1 and end != -1:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
+            match = _JSON_RE.search(response_text)
+            if match:
+                json_text = match.group(0)
+                result = orjson.loads(json_text)
+                self._categorize_cache[cache_key] = json_text
+                return result
             else:
                  # Fallback
-                return {"categories": {}, "attributes": {}, "compliance": [], "confidence": 0.0}
+                return _empty_categorization()
         except json.JSONDecodeError:
             logger.error("Failed to parse LLM response as JSON")
-            return {"categories": {}, "attributes": {}, "compliance": [], "confidence": 0.0}
+            return _empty_categorization()
 
 
-    def extract_entities(self, text: str) -> Dict[str, Any]:
+    async def extract_entities(self, text: str) -> Dict[str, Any]:
         """
         Extract business entities from a voice transcript.
         """
-        system_prompt = """You are an AI assistant processing voice transcripts for business registration.
-        Extract the following fields: Company Name, Owner Name, Location (City/State), Products (list), Contact Info (Phone/Email).
-        Return ONLY valid JSON."""
-
-        prompt = f"""
-        Transcript: "{text}"
+        if not text or len(text.strip()) < MIN_INPUT_LENGTH:
+            return {}
 
-        Output Format (JSON):
-        {{
-            "company_name": "Name or null",
-            "owner_name": "Name or null",
-            "location": {{
-                "city": "City or null",
-                "state": "State or null"
-            }},
-            "products": ["product1", "product2"],
-            "contact": {{
-                "phone": "Number or null",
-                "email": "Email or null"
-            }}
-        }}
-        """
+        prompt = self.ENTITIES_PROMPT_PREFIX + f'Transcript: "{text}"\n'
 
         try:
-            response_text = self._generate(prompt, system_prompt)
-            start = response_text.find('{')
-            end = response_text.rfind('}') + 1
-            if start != -1 and end != -1:
-                json_str = response_text[start:end]
-                return json.loads(json_str)
+            response_text = await self._batcher.submit(prompt, self.ENTITIES_SYSTEM_PROMPT)
+            match = _JSON_RE.search(response_text)
+            if match:
+                return orjson.loads(match.group(0))
             else:
                 return {}
         except Exception:
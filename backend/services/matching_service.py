@@ -1,32 +1,69 @@
 from typing import Dict, Any, List, Optional
 from models.schemas import MatchResult, MatchScore, MatchExplanation, SNP, Location
-import uuid
+import heapq
+import secrets
 import random
-import urllib.request
-import urllib.parse
-from bs4 import BeautifulSoup
+import re
+import html
+from urllib.parse import urlparse, parse_qs
 import asyncio
+import httpx
+from cachetools import TTLCache
+
+MAX_CONCURRENT_SEARCHES = 10  # keep batch jobs under DuckDuckGo's rate limits
 
 class MatchingService:
+    # Result titles and snippets in document order, each snippet follows its title
+    _RE_RESULT = re.compile(
+        r'<h2[^>]*class="[^"]*result__title[^"]*"[^>]*>(?P<title>.*?)</h2>'
+        r'|<a(?P<attrs>[^>]*class="[^"]*result__snippet[^"]*"[^>]*)>(?P<snippet>.*?)</a>',
+        re.S
+    )
+    _RE_HREF = re.compile(r'href="([^"]*)"')
+    _RE_TAG = re.compile(r'<[^>]+>')
+
     def __init__(self):
         self.model_loaded = True
-        
-    def _fetch_live_data_sync(self, query: str, top_k: int) -> List[Dict[str, str]]:
-        url = "https://html.duckduckgo.com/html/?q=" + urllib.parse.quote(query)
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
+        self._http = None
+        # Scraping is the slow part of matching and repeat queries are common
+        self._search_cache: TTLCache = TTLCache(maxsize=1024, ttl=900)
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        """Keep-alive client so repeat searches skip the TCP/TLS handshake"""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'},
+                timeout=10.0,
+                follow_redirects=True,
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+        return self._http
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _clean_text(self, fragment: str) -> str:
+        return html.unescape(self._RE_TAG.sub('', fragment)).strip()
+
+    async def _fetch_live_data(self, query: str, top_k: int) -> List[Dict[str, str]]:
         try:
-            html = urllib.request.urlopen(req, timeout=10).read()
-            soup = BeautifulSoup(html, 'html.parser')
+            response = await self.http.get("https://html.duckduckgo.com/html/", params={"q": query})
+            response.raise_for_status()
             results = []
-            for a in soup.find_all('a', class_='result__snippet', limit=top_k):
-                link = a.get('href', '')
-                try:
-                    title_elem = a.find_previous('h2', class_='result__title')
-                    title = title_elem.text.strip() if title_elem else 'Unknown Vendor'
-                except:
-                    title = 'Unknown Vendor'
-                snippet = a.text.strip()
-                results.append({'title': title, 'body': snippet, 'href': link})
+            title = 'Unknown Vendor'
+            for match in self._RE_RESULT.finditer(response.text):
+                if match.group('title') is not None:
+                    title = self._clean_text(match.group('title')) or 'Unknown Vendor'
+                    continue
+                href = self._RE_HREF.search(match.group('attrs'))
+                link = html.unescape(href.group(1)) if href else ''
+                results.append({'title': title, 'body': self._clean_text(match.group('snippet')), 'href': link})
+                title = 'Unknown Vendor'
+                if len(results) >= top_k:
+                    break
             return results
         except Exception as e:
             print(f"Live search fetch failed: {e}")
@@ -68,30 +105,41 @@ class MatchingService:
         
         matches = []
         try:
-            # Perform Live Search off the main thread to avoid blocking uvicorn
-            results = await asyncio.to_thread(self._fetch_live_data_sync, query, top_k)
+            cache_key = (" ".join(sorted(query.lower().split())), top_k)
+            results = self._search_cache.get(cache_key)
+            if results is None:
+                results = await self._fetch_live_data(query, top_k)
+                if results:  # don't cache failed or empty searches
+                    self._search_cache[cache_key] = results
             
+            # Everything below that doesn't depend on the individual result is computed once
+            state_label = mse_state.capitalize() if mse_state else "India"
+            categories = [mse_product_text] if mse_product_text else ["General Vendor"]
+            loc_score = 0.9 if mse_state else 0.5
+            cat_score = 0.9 if mse_product_text else 0.5
+            match_reason = f"Live Web Match for '{mse_product_text}'"
+
             for index, res in enumerate(results):
                 title = res.get('title', 'Unknown Vendor')
                 body = res.get('body', 'No description available')
                 href = res.get('href', '')
                 
-                if href and href.startswith('//duckduckgo.com/l/?uddg='):
-                    encoded_url = href.split('uddg=')[1].split('&')[0]
-                    href = urllib.parse.unquote(encoded_url)
+                if href and href.startswith('//duckduckgo.com/l/'):
+                    href = parse_qs(urlparse(href).query).get('uddg', [href])[0]
 
-                # We dynamically construct an SNP from the web result
-                snp = SNP(
-                    id=str(uuid.uuid4())[:8],
+                # We dynamically construct an SNP from the web result. All of these values are
+                # built here, so model_construct skips re-validating them; the API boundary still validates
+                snp = SNP.model_construct(
+                    id=secrets.token_hex(4),
                     name=title[:50],  # truncate if too long
                     description=f"{body[:150]}... (Source: {href[:30]})",
-                    location=Location(
-                        state=mse_state.capitalize() if mse_state else "India",
+                    location=Location.model_construct(
+                        state=state_label,
                         city="Online / Available",
                         address=href[:100], # Store URL in address
                         pincode="000000"
                     ),
-                    categories=[mse_product_text] if mse_product_text else ["General Vendor"],
+                    categories=categories,
                     rating=round(random.uniform(3.5, 5.0), 1),
                     onboarding_success_rate=round(random.uniform(0.7, 0.99), 2),
                     commission_rate=round(random.uniform(1.0, 5.0), 1),
@@ -100,20 +148,18 @@ class MatchingService:
                 
                 # --- SCORING LOGIC (Heuristic based on rank) ---
                 base_score = 1.0 - (index * 0.1) # 1.0, 0.9, 0.8...
-                loc_score = 0.9 if mse_state else 0.5
-                cat_score = 0.9 if mse_product_text else 0.5
                 perf_score = snp.onboarding_success_rate
                 overall_score = base_score * 0.9
                 
-                match_score = MatchScore(
+                match_score = MatchScore.model_construct(
                     overall_score=overall_score,
                     location_match=loc_score,
                     category_match=cat_score,
                     performance_match=perf_score
                 )
                 
-                explanation = MatchExplanation(
-                    main_reasons=[f"Live Web Match for '{mse_product_text}'", f"Rank {index+1} Source: {href[:25]}"],
+                explanation = MatchExplanation.model_construct(
+                    main_reasons=[match_reason, f"Rank {index+1} Source: {href[:25]}"],
                     strengths=["Top internet search result", "Vendor mapped dynamically"]
                 )
                 
@@ -130,24 +176,25 @@ class MatchingService:
         if not matches:
              print("Falling back to simulated web data because search returned no results")
              for i in range(top_k):
-                 snp = SNP(
-                    id=str(uuid.uuid4())[:8],
+                 snp = SNP.model_construct(
+                    id=secrets.token_hex(4),
                     name=f"{mse_product_text.capitalize()} Solutions {i+1}",
                     description=f"Leading provider of {mse_product_text} based in {mse_state}",
-                    location=Location(state=mse_state.capitalize() if mse_state else "India", city="Simulated", address="www.example-live-data.com", pincode="000000"),
+                    location=Location.model_construct(state=mse_state.capitalize() if mse_state else "India", city="Simulated", address="www.example-live-data.com", pincode="000000"),
                     categories=[mse_product_text], rating=4.5, onboarding_success_rate=0.9, commission_rate=2.0, capabilities=["Fallback Online Data"]
                  )
                  matches.append({
                     "snp": snp, "score": 0.8,
-                    "match_score": MatchScore(overall_score=0.8, location_match=0.8, category_match=0.8, performance_match=0.8),
-                    "explanation": MatchExplanation(main_reasons=["Simulated Live Result"], strengths=["Fallback Provider"])
+                    "match_score": MatchScore.model_construct(overall_score=0.8, location_match=0.8, category_match=0.8, performance_match=0.8),
+                    "explanation": MatchExplanation.model_construct(main_reasons=["Simulated Live Result"], strengths=["Fallback Provider"])
                  })
 
-        matches.sort(key=lambda x: x["score"], reverse=True)
-        
+        # Only the top_k are returned, no need to order the whole pool
+        top = heapq.nlargest(top_k, matches, key=lambda x: x["score"])
+
         results = []
-        for i, item in enumerate(matches):
-            results.append(MatchResult(
+        for i, item in enumerate(top):
+            results.append(MatchResult.model_construct(
                 snp=item["snp"],
                 match_score=item["match_score"],
                 explanation=item["explanation"],
@@ -156,6 +203,15 @@ class MatchingService:
             
         return results
 
+    async def match_batch(self, profiles: List[Dict[str, Any]], top_k: int = 3) -> List[List[MatchResult]]:
+        """Match several MSE profiles concurrently, results in input order"""
+        sem = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+        return await asyncio.gather(*(self._guarded_match(sem, profile, top_k) for profile in profiles))
+
+    async def _guarded_match(self, sem: asyncio.Semaphore, profile: Dict[str, Any], top_k: int) -> List[MatchResult]:
+        async with sem:
+            return await self.match_mse_to_snps(profile, top_k)
+
     async def record_feedback(self, mse_id: str, snp_id: str, accepted: bool, rating: Optional[int] = None, comments: Optional[str] = None):
         return "feedback_recorded"
 
@@ -1,33 +1,39 @@
 import base64
-from typing import Dict, Any, List
+from typing import Dict, Any, BinaryIO, Sequence
+
+# Tiny blank wav mock, encoded once at import
+_MOCK_TTS_B64 = base64.b64encode(b"RIFF....WAVEfmt ....data....").decode("utf-8")
+
+_MOCK_TRANSCRIPTS = {
+    "hi": "मेरी कंपनी का नाम राज हस्तशिल्प है और हम लकड़ी के खिलौने बनाते हैं",
+    "en": "My company name is Raj Handicrafts and we make wooden toys"
+}
+_MOCK_TRANSCRIPT_DEFAULT = "Unknown language input"
+
+# Shared by every call, callers only read it
+_MOCK_ENTITIES = (
+    {"entity": "Raj Handicrafts", "type": "ORG"},
+    {"entity": "wooden toys", "type": "PRODUCT"}
+)
 
 class VoiceService:
-    def transcribe(self, audio_bytes: bytes, language: str) -> Dict[str, Any]:
+    def transcribe(self, audio_file: BinaryIO, language: str) -> Dict[str, Any]:
         """Mock transcription"""
         # In a real app, this would call Azure/Google Speech API or Whisper
-        mock_text = {
-            "hi": "मेरी कंपनी का नाम राज हस्तशिल्प है और हम लकड़ी के खिलौने बनाते हैं",
-            "en": "My company name is Raj Handicrafts and we make wooden toys"
-        }.get(language, "Unknown language input")
-        
         return {
-            "text": mock_text,
+            "text": _MOCK_TRANSCRIPTS.get(language, _MOCK_TRANSCRIPT_DEFAULT),
             "confidence": 0.95,
             "processing_time": 1.2
         }
 
-    def extract_entities(self, text: str, language: str) -> List[Dict[str, Any]]:
+    def extract_entities(self, text: str, language: str) -> Sequence[Dict[str, Any]]:
         """Mock entity extraction"""
         # Mocking generic extraction for demo
-        return [
-            {"entity": "Raj Handicrafts", "type": "ORG"},
-            {"entity": "wooden toys", "type": "PRODUCT"}
-        ]
+        return _MOCK_ENTITIES
 
     def text_to_speech(self, text: str, language: str) -> str:
         """Mock TTS - returns empty audio for now"""
-        # Return a tiny blank wav mock
-        return base64.b64encode(b"RIFF....WAVEfmt ....data....").decode("utf-8")
+        return _MOCK_TTS_B64
     
     def get_metrics(self):
         return {"total_transcriptions": 100, "avg_accuracy": 0.98}
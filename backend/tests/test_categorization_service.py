@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from services import categorization_service
+from services.categorization_service import CategorizationService
+
+TAXONOMY = {
+    "categories": {
+        "Food": {
+            "Spices": {
+                "Whole": ["pepper", "cardamom"],
+                "Ground": ["turmeric powder", "chilli powder"],
+            },
+            "Beverages": {
+                "Tea": ["green tea", "masala chai"],
+            },
+        },
+        "Toys": ["doll", "kitchen set"],
+        "Handicrafts": {
+            "Wooden": {
+                "Decor": ["wooden elephant", "carving"],
+            },
+        },
+    }
+}
+
+
+@pytest.fixture(params=["index", "automaton"])
+def service(request, monkeypatch):
+    if request.param == "automaton":
+        pytest.importorskip("ahocorasick")
+    else:
+        monkeypatch.setattr(categorization_service, "ahocorasick", None)
+    service = CategorizationService()
+    service.llm = None
+    service.taxonomy = TAXONOMY
+    service._build_keyword_index()
+    assert (service._automaton is not None) == (request.param == "automaton")
+    return service
+
+
+def categorize(service, description):
+    result = asyncio.run(service.categorize(description))
+    categories = result["categories"]["categories"]
+    return categories["level_1"], categories["level_2"], categories["level_3"], result["confidence"]
+
+
+def test_leaf_item_match(service):
+    assert categorize(service, "Organic black pepper from Kerala") == ("Food", "Spices", "Whole", 0.8)
+
+
+def test_multi_word_item_match(service):
+    assert categorize(service, "Pure turmeric powder, 500g") == ("Food", "Spices", "Ground", 0.8)
+
+
+def test_node_keyword_scores_every_leaf_below_it(service):
+    # "tea" is not an item, but the Tea node scores its leaves; "green tea" adds the item weight
+    assert categorize(service, "Darjeeling green tea leaves") == ("Food", "Beverages", "Tea", 0.8)
+    assert categorize(service, "tea") == ("Food", "Beverages", "Tea", 0.8)
+
+
+def test_short_path_leaf_gets_default_labels(service):
+    # A leaf directly under level 1 reports General / General Items, not labels left over from
+    # a lower-scoring match elsewhere ("whole" hits Food > Spices > Whole)
+    assert categorize(service, "whole doll kitchen") == ("Toys", "General", "General Items", 0.8)
+
+
+def test_single_words_match_whole_words_only(service):
+    assert categorize(service, "peppermint candy") == ("Others", "General", "General Items", 0.5)
+    assert categorize(service, "dollhouse") == ("Others", "General", "General Items", 0.5)
+
+
+def test_ties_go_to_first_leaf_in_taxonomy(service):
+    assert categorize(service, "pepper and cardamom") == ("Food", "Spices", "Whole", 0.8)
+    assert categorize(service, "doll with carving") == ("Toys", "General", "General Items", 0.8)
+
+
+def test_no_match_falls_back_to_others(service):
+    assert categorize(service, "industrial lathe") == ("Others", "General", "General Items", 0.5)
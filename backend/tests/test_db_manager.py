@@ -0,0 +1,175 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from models.schemas import Application, MSEProfile
+
+
+@pytest.fixture
+def dbm(tmp_path, monkeypatch):
+    # DB_FILE is relative, so every test gets its own database under tmp_path
+    monkeypatch.chdir(tmp_path)
+    from database import db_manager
+    monkeypatch.setattr(db_manager, "FLUSH_WINDOW", 0.01)
+    return db_manager
+
+
+def make_application(app_id: str, status: str = "submitted") -> Application:
+    profile = MSEProfile(
+        company_name="Raj Handicrafts", owner_name="Raj", phone="9999999999",
+        email="raj@example.com", state="Rajasthan", city="Jaipur"
+    )
+    return Application(id=app_id, mse_profile=profile, status=status)
+
+
+def test_close_writes_pending_applications(dbm):
+    async def scenario():
+        manager = dbm.DBManager()
+        await manager.create_application(make_application("app_1"))
+        # Close straight away, before the flusher had a chance to run
+        await manager.close()
+
+    asyncio.run(scenario())
+
+    stored = asyncio.run(dbm.DBManager().get_application("app_1"))
+    assert stored is not None
+    assert stored.mse_profile.company_name == "Raj Handicrafts"
+
+
+def test_manager_is_usable_after_close(dbm):
+    manager = dbm.DBManager()
+
+    async def first_cycle():
+        await manager.create_application(make_application("app_1"))
+        await manager.close()
+
+    async def second_cycle():
+        assert (await manager.get_application("app_1")) is not None
+        await manager.create_application(make_application("app_2"))
+        await manager.close()
+
+    # Each asyncio.run is a separate event loop, like two app lifespans in a row
+    asyncio.run(first_cycle())
+    asyncio.run(second_cycle())
+
+    ids = {app.application_id for app in asyncio.run(dbm.DBManager().list_applications())}
+    assert ids == {"app_1", "app_2"}
+
+
+def lock_database(dbm) -> sqlite3.Connection:
+    """Hold SQLite's write lock from another connection, like a second worker mid-write"""
+    blocker = sqlite3.connect(dbm.DB_FILE, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    return blocker
+
+
+def stored_ids(dbm) -> list:
+    with sqlite3.connect(dbm.DB_FILE) as conn:
+        return [row[0] for row in conn.execute("SELECT id FROM applications")]
+
+
+def test_failed_flush_is_retried(dbm, monkeypatch):
+    monkeypatch.setattr(dbm, "BUSY_TIMEOUT", 0.05)
+    manager = dbm.DBManager()
+
+    async def scenario():
+        blocker = lock_database(dbm)
+        try:
+            await manager.create_application(make_application("app_1"))
+            # Long enough for several flush attempts to hit the locked database
+            await asyncio.sleep(0.5)
+            assert "app_1" in manager._pending
+            assert (await manager.get_application("app_1")) is not None
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+
+        for _ in range(200):
+            if not manager._pending:
+                break
+            await asyncio.sleep(0.01)
+        # Written by the flusher's retry once the lock is gone, not by close()
+        assert not manager._pending
+        assert not manager.conn.in_transaction
+        await manager.close()
+
+    asyncio.run(scenario())
+
+    assert stored_ids(dbm) == ["app_1"]
+
+
+def test_close_keeps_applications_when_final_write_fails(dbm, monkeypatch):
+    monkeypatch.setattr(dbm, "BUSY_TIMEOUT", 0.05)
+    manager = dbm.DBManager()
+
+    async def scenario():
+        blocker = lock_database(dbm)
+        try:
+            await manager.create_application(make_application("app_1"))
+            with pytest.raises(sqlite3.OperationalError):
+                await manager.close()
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+        # Connections were released, the application is still held for the next close()
+        assert manager._conn is None and manager._read_conn is None
+        assert "app_1" in manager._pending
+        await manager.close()
+
+    asyncio.run(scenario())
+
+    assert stored_ids(dbm) == ["app_1"]
+
+
+def test_last_write_wins(dbm):
+    manager = dbm.DBManager()
+
+    async def scenario():
+        await manager.create_application(make_application("app_1"))
+        await manager.create_application(make_application("app_1", status="verified"))
+        assert (await manager.get_application("app_1")).status == "verified"
+        await manager.close()
+
+    asyncio.run(scenario())
+
+    assert asyncio.run(dbm.DBManager().get_application("app_1")).status == "verified"
+
+
+def test_failed_write_leaves_no_open_transaction(dbm):
+    manager = dbm.DBManager()
+    # Wrong number of bindings fails inside the transaction
+    with pytest.raises(Exception):
+        manager._upsert("applications", [("app_1",)])
+    assert not manager.conn.in_transaction
+
+    manager._upsert("applications", [("app_1", dbm._to_json(make_application("app_1")))])
+    assert asyncio.run(manager.get_application("app_1")) is not None
+
+
+def test_reads_do_not_wait_on_a_blocked_write(dbm, monkeypatch):
+    monkeypatch.setattr(dbm, "BUSY_TIMEOUT", 1.0)
+    manager = dbm.DBManager()
+    manager._upsert("applications", [("app_1", dbm._to_json(make_application("app_1")))])
+
+    # Another process holds the write lock, so the flush thread sits in SQLite's busy wait
+    blocker = sqlite3.connect(dbm.DB_FILE, isolation_level=None)
+    blocker.execute("BEGIN IMMEDIATE")
+    writer = threading.Thread(
+        target=lambda: pytest.raises(sqlite3.OperationalError, manager._upsert, "applications",
+                                     [("app_2", dbm._to_json(make_application("app_2")))])
+    )
+    writer.start()
+    try:
+        time.sleep(0.1)
+        assert manager._lock.locked()
+        started = time.monotonic()
+        assert asyncio.run(manager.get_application("app_1")) is not None
+        assert [app.application_id for app in asyncio.run(manager.list_applications())] == ["app_1"]
+        assert time.monotonic() - started < 0.5
+    finally:
+        writer.join()
+        blocker.execute("ROLLBACK")
+        blocker.close()
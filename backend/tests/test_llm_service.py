@@ -0,0 +1,191 @@
+import asyncio
+
+import httpx
+import orjson
+
+from services import llm_service
+from services.llm_service import LLMService
+
+
+def ndjson(*pieces, done=True) -> bytes:
+    lines = [orjson.dumps({"response": piece, "done": False}) for piece in pieces]
+    if done:
+        lines.append(orjson.dumps({"response": "", "done": True}))
+    return b"\n".join(lines) + b"\n"
+
+
+def make_service(handler) -> LLMService:
+    service = LLMService()
+    service._client = httpx.AsyncClient(base_url=service.base_url, transport=httpx.MockTransport(handler))
+    return service
+
+
+def test_generate_stops_at_first_json_object():
+    def handler(request):
+        return httpx.Response(200, content=ndjson('Sure: {"a": ', '{"b": 1}}', " trailing {junk"))
+
+    async def scenario():
+        service = make_service(handler)
+        try:
+            return await service._generate("prompt")
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(scenario()) == 'Sure: {"a": {"b": 1}}'
+
+
+def test_generate_times_out_on_endless_stream(monkeypatch):
+    monkeypatch.setattr(llm_service, "GENERATE_TIMEOUT", 0.2)
+
+    class EndlessStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            # Tokens keep arriving, so no per-chunk timeout ever fires
+            while True:
+                yield orjson.dumps({"response": "{", "done": False}) + b"\n"
+                await asyncio.sleep(0.01)
+
+    def handler(request):
+        return httpx.Response(200, stream=EndlessStream())
+
+    async def scenario():
+        service = make_service(handler)
+        try:
+            return await asyncio.wait_for(service._generate("prompt"), timeout=5)
+        finally:
+            await service.aclose()
+
+    assert asyncio.run(scenario()) == ""
+
+
+def test_batcher_fans_results_out_to_callers():
+    calls = []
+
+    async def generate(prompt, system_prompt=None):
+        calls.append((prompt, system_prompt))
+        return f"{system_prompt}:{prompt}"
+
+    async def scenario():
+        batcher = llm_service._Batcher(generate)
+        try:
+            return await asyncio.gather(
+                batcher.submit("a", "sys"),
+                batcher.submit("b", "sys"),
+                batcher.submit("a", "sys"),
+                batcher.submit("a", "other"),
+            )
+        finally:
+            await batcher.aclose()
+
+    assert asyncio.run(scenario()) == ["sys:a", "sys:b", "sys:a", "other:a"]
+    # The duplicate prompt in the same window shares one generation
+    assert sorted(calls) == [("a", "other"), ("a", "sys"), ("b", "sys")]
+
+
+def test_batcher_passes_errors_to_every_caller_in_group():
+    async def generate(prompt, system_prompt=None):
+        raise ValueError(prompt)
+
+    async def scenario():
+        batcher = llm_service._Batcher(generate)
+        try:
+            return await asyncio.gather(batcher.submit("a"), batcher.submit("a"), return_exceptions=True)
+        finally:
+            await batcher.aclose()
+
+    results = asyncio.run(scenario())
+    assert [type(result) for result in results] == [ValueError, ValueError]
+
+
+def test_batcher_close_releases_waiting_callers():
+    started = None
+
+    async def generate(prompt, system_prompt=None):
+        started.set()
+        await asyncio.sleep(60)
+        return prompt
+
+    async def scenario():
+        nonlocal started
+        started = asyncio.Event()
+        batcher = llm_service._Batcher(generate)
+        in_flight = asyncio.ensure_future(batcher.submit("in flight"))
+        await started.wait()
+        # Still sitting in the queue when the batcher shuts down
+        queued = asyncio.ensure_future(batcher.submit("queued"))
+        await asyncio.sleep(0)
+        await batcher.aclose()
+        return await asyncio.wait_for(asyncio.gather(in_flight, queued, return_exceptions=True), timeout=1)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_extract_entities_returns_empty_when_service_closes():
+    def handler(request):
+        raise AssertionError("unused, _generate is replaced below")
+
+    async def scenario():
+        service = make_service(handler)
+        started = asyncio.Event()
+
+        async def slow_generate(prompt, system_prompt=None):
+            started.set()
+            await asyncio.sleep(60)
+
+        service._batcher._generate = slow_generate
+        call = asyncio.ensure_future(service.extract_entities("Raj Handicrafts from Jaipur"))
+        await started.wait()
+        await service.aclose()
+        return await asyncio.wait_for(call, timeout=1)
+
+    assert asyncio.run(scenario()) == {}
+
+
+def test_tiny_input_skips_the_llm_and_returns_fresh_results():
+    def handler(request):
+        raise AssertionError("no request expected for tiny input")
+
+    async def scenario():
+        service = make_service(handler)
+        try:
+            first = await service.categorize_product("  a ")
+            first["compliance"].append("FSSAI")
+            first["categories"]["level_1"] = "Food"
+            return first, await service.categorize_product(""), await service.extract_entities(" ")
+        finally:
+            await service.aclose()
+
+    _, second, entities = asyncio.run(scenario())
+    assert second == {"categories": {}, "attributes": {}, "compliance": [], "confidence": 0.0}
+    assert entities == {}
+
+
+def test_cached_categorization_is_not_shared_between_callers():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, content=ndjson(
+            '{"categories": {"level_1": "Food"}, "attributes": {"form": "whole"},',
+            ' "compliance": ["FSSAI"], "confidence": 0.9}'
+        ))
+
+    async def scenario():
+        service = make_service(handler)
+        try:
+            first = await service.categorize_product("Organic black pepper")
+            first["categories"]["level_1"] = "Toys"
+            first["attributes"].clear()
+            first["compliance"].append("BIS")
+            return await service.categorize_product("organic  black pepper")
+        finally:
+            await service.aclose()
+
+    second = asyncio.run(scenario())
+    assert len(requests) == 1
+    assert second == {
+        "categories": {"level_1": "Food"},
+        "attributes": {"form": "whole"},
+        "compliance": ["FSSAI"],
+        "confidence": 0.9,
+    }
@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from services.matching_service import MatchingService
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "duckduckgo_results.html")
+
+
+def load_page() -> bytes:
+    with open(FIXTURE, "rb") as f:
+        return f.read()
+
+
+def make_service(handler) -> MatchingService:
+    service = MatchingService()
+    service._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+def fetch(query: str, top_k: int, handler=None):
+    def serve_page(request):
+        return httpx.Response(200, content=load_page(), headers={"content-type": "text/html; charset=UTF-8"})
+
+    async def scenario():
+        service = make_service(handler or serve_page)
+        try:
+            return await service._fetch_live_data(query, top_k)
+        finally:
+            await service.aclose()
+
+    return asyncio.run(scenario())
+
+
+def test_parses_titles_snippets_and_links():
+    results = fetch("tea supplier", 10)
+
+    assert [result["title"] for result in results] == [
+        "Wholesale Assam Tea - Direct From Gardens",
+        "Assam Tea Traders & Exporters | Verified Suppliers",
+        "Chai Co – Guwahati's Tea Agency",
+        "চা বোর্ড Tea Board Directory",
+    ]
+    assert results[1]["body"] == (
+        'Directory of CTC and orthodox tea suppliers in Dibrugarh & Jorhat. '
+        'Compare prices, MOQ and "garden fresh" grades.'
+    )
+    assert results[2]["body"].startswith("Distributor for 40+ estates.")
+    assert results[2]["body"].endswith("within 5\xa0days.")
+    # Entities in the href are decoded, the redirect itself is resolved later
+    assert results[1]["href"] == (
+        "//duckduckgo.com/l/?uddg=https%3A%2F%2Fwww.assamteatraders.example%2Fsuppliers"
+        "%3Fregion%3Dupper%2Dassam&rut=3f1c2a9b0d"
+    )
+    assert results[3]["href"] == "https://www.teaboard.example/directory"
+
+
+def test_stops_at_top_k():
+    results = fetch("tea supplier", 2)
+    assert len(results) == 2
+    assert results[1]["title"] == "Assam Tea Traders & Exporters | Verified Suppliers"
+
+
+def test_failed_search_returns_no_results():
+    def unavailable(request):
+        return httpx.Response(503)
+
+    assert fetch("tea supplier", 3, handler=unavailable) == []
+
+
+def test_matches_show_decoded_vendor_links():
+    def serve_page(request):
+        return httpx.Response(200, content=load_page())
+
+    async def scenario():
+        service = make_service(serve_page)
+        try:
+            return await service.match_mse_to_snps({"state": "assam", "products": ["tea"]}, top_k=4)
+        finally:
+            await service.aclose()
+
+    matches = asyncio.run(scenario())
+
+    assert [match.rank for match in matches] == [1, 2, 3, 4]
+    addresses = {match.snp.name: match.snp.location.address for match in matches}
+    assert addresses["Assam Tea Traders & Exporters | Verified Suppliers"] == (
+        "https://www.assamteatraders.example/suppliers?region=upper-assam"
+    )
+    assert addresses["Chai Co – Guwahati's Tea Agency"] == "https://chai-co.example/"
+    assert addresses["চা বোর্ড Tea Board Directory"] == (
+        "https://www.teaboard.example/directory"
+    )
+    # Ad links are not DuckDuckGo redirects and pass through untouched
+    assert addresses["Wholesale Assam Tea - Direct From Gardens"].startswith("https://duckduckgo.com/y.js?")
+
+
+def test_same_results_as_html_parser():
+    bs4 = pytest.importorskip("bs4")
+    # The BeautifulSoup walk the regex replaced
+    soup = bs4.BeautifulSoup(load_page(), "html.parser")
+    expected = []
+    for a in soup.find_all("a", class_="result__snippet", limit=10):
+        title_elem = a.find_previous("h2", class_="result__title")
+        expected.append({
+            "title": title_elem.text.strip() if title_elem else "Unknown Vendor",
+            "body": a.text.strip(),
+            "href": a.get("href", ""),
+        })
+
+    assert fetch("tea supplier", 10) == expected